@@ -6,3 +6,10 @@ COLUMN_SQL_TYPES = {
 }
 
 COLUMN_SQL_TYPES.update({attr: 'BLOP' for attr in NLP_ATTRIBUTES})
+
+# Default headers for all HTTP requests. Compressed responses are requested to reduce transfer and parsing time.
+REQUEST_HEADERS = {
+    'Accept-Encoding': 'gzip, deflate, br',
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+                  'Chrome/120.0.0.0 Safari/537.36',
+}
@@ -3,9 +3,16 @@ This module contains the NewspaperManager class which is used to scrape articles
 used as a base class for the actual scrapers.
 """
 
+import os
 import re
+import pickle
+import hashlib
+import asyncio
 import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 import numpy as np
 import pandas as pd
@@ -21,11 +28,16 @@ except ImportError:
 from .utils.logger import log
 from .settings import settings
 from .constants import NLP_ATTRIBUTES
+from .constants import REQUEST_HEADERS
 from .utils.utils import flatten_dict
 from .utils.utils import get_selenium_webdriver
 from .utils.utils import retry_on_exception
+from .utils.utils import AsyncFetcher
+from .utils.utils import map_bounded
+from .utils.utils import html_body
 from .database import Database
 from selenium.common.exceptions import WebDriverException
+from selenium.common.exceptions import InvalidCookieDomainException
 
 
 class NewspaperManager:
@@ -41,9 +53,15 @@ class NewspaperManager:
         - _parse_article: Parses the HTML of an article and returns a DataFrame with the parsed infos.
         - _get_published_articles: Not implemented. Needs to be implemented in the actual scraper.
         - _soup_get_html: Not implemented. Needs to be implemented in the actual scraper.
+        - _soup_get_html_batch: Calls _soup_get_html for multiple urls. Can be overwritten to scrape concurrently.
         - _selenium_login: Not implemented. Needs to be implemented in the actual scraper.
+        - _selenium_check_login: Optional. Allows to restore previous logins from cookies if implemented.
     """
 
+    # Page which is loaded to restore a previous login from cookies. Needs to be set by the child class together with
+    # an implementation of _selenium_check_login.
+    _selenium_base_url = None
+
     def __init__(self, db_file):
         self.newspaper_id = re.sub(r'(?<!^)(?=[A-Z])', '_', self.__class__.__name__).lower()
         log.info(f'Initializing {self.newspaper_id} scraper.')
@@ -51,6 +69,22 @@ class NewspaperManager:
         self._db = Database(db_file=db_file)
         self._selenium_driver = None
         self._spacy_nlp = None
+        # Default of _request_many. Disabled by index_articles_by_date_range while it already requests several days
+        # at the same time.
+        self._concurrent_requests = True
+
+        # Shared HTTP session to reuse connections (keep-alive) across requests
+        self._session = requests.Session()
+        self._session.headers['Connection'] = 'keep-alive'
+        self._session.headers.update(REQUEST_HEADERS)
+        # Only retry transient connection errors. Error responses are returned as is and handled in _request.
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                              max_retries=Retry(total=3, backoff_factor=0.2, respect_retry_after_header=False,
+                                                raise_on_status=False))
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        # Keeps the event loop and the aiohttp session of _request_many alive between batches
+        self._async_fetcher = AsyncFetcher(timeout=settings.request_timeout)
 
     @property
     def selenium_driver(self):
@@ -91,14 +125,27 @@ class NewspaperManager:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self._db.close()
+        self._session.close()
+        self._async_fetcher.close()
 
-    @staticmethod
-    def _request(url, get_full_response=False):
+    def _request(self, url, get_full_response=False):
+        """
+        Requests a url with the shared session and returns the body. The body is returned as raw bytes, so the parsers
+        can detect the encoding themselves (e.g. from the meta charset tag) without a slow guess by requests. Only if
+        the charset is declared in the Content-Type header alone, the body is decoded with it (see _response_html).
 
+        Args:
+            url (str): Url to request.
+            get_full_response (bool, optional): If True, the requests.Response object is returned instead of the
+                body. Defaults to False.
+
+        Returns:
+            bytes, str or requests.Response: The body or the full response. None if the request failed.
+        """
         # Get the HTML of the article
         try:
-            response = requests.get(url)
-        except requests.exceptions.ConnectionError:
+            response = self._session.get(url, timeout=settings.request_timeout)
+        except requests.exceptions.RequestException:
             log.warning(f'Connection error while requesting {url}.')
             return None
 
@@ -107,13 +154,56 @@ class NewspaperManager:
             if get_full_response:
                 return response
             else:
-                return response.text
+                return self._response_html(response)
         elif response.status_code == 404:
             return None
         else:
             log.warning(f"{response.status_code} error scraping {response.url}.")
             return None
 
+    @staticmethod
+    def _response_html(response):
+        """
+        Returns the body of a response for the html parsers, passing on the charset of the Content-Type header if the
+        document itself does not declare one.
+
+        Args:
+            response (requests.Response): The response.
+
+        Returns:
+            bytes or str: The body.
+        """
+        charset = None
+        if 'charset' in response.headers.get('Content-Type', '').lower():
+            charset = requests.utils.get_encoding_from_headers(response.headers)
+        return html_body(response.content, charset)
+
+    def _request_many(self, urls, limit=8, concurrent=None):
+        """
+        Requests multiple urls concurrently and returns their html in the same order. Falls back to sequential
+        requests if concurrent is False or if an event loop is already running (e.g. in a Jupyter notebook).
+
+        Args:
+            urls ([str]): Urls to request.
+            limit (int, optional): Maximum number of simultaneous connections. Defaults to 8.
+            concurrent (bool, optional): If False, the urls are requested one after another. Defaults to None, which
+                requests concurrently unless index_articles_by_date_range already requests several days at the same
+                time and therefore limits the connections itself.
+
+        Returns:
+            [bytes or str]: Html of each url (see _request). None if the request failed.
+        """
+        if not urls:
+            return []
+        if concurrent is None:
+            concurrent = self._concurrent_requests
+        if concurrent:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return self._async_fetcher.fetch_all(urls, limit=limit)
+        return [self._request(url) for url in urls]
+
     @staticmethod
     def _parse_article(html, url):
         """
@@ -150,7 +240,7 @@ class NewspaperManager:
         return parsed_infos
 
     # @retry_on_exception
-    def index_articles_by_date_range(self, date_from, date_to, freq='D', skip_existing=True):
+    def index_articles_by_date_range(self, date_from, date_to, freq='D', skip_existing=True, concurrency=8):
         """
         Indexes all articles published between date_from and date_to for a given newspaper. Indexing means that the
         articles are added to the database and their URLs are stored. The actual scraping of the articles is done
@@ -161,6 +251,9 @@ class NewspaperManager:
             date_to (dt.datetime or str): The last day to scrape articles from.
             freq (str, optional): The frequency of the date range. Defaults to 'D'.
             skip_existing (bool, optional): If True, days that are already indexed are skipped. Defaults to True.
+            concurrency (int, optional): Number of days which are requested at the same time. This is also the
+                maximum number of simultaneous requests. The results are still added to the database one day after
+                another. If set to 1, the pages of a single day are requested concurrently instead. Defaults to 8.
         """
 
         date_from = pd.to_datetime(date_from)
@@ -198,46 +291,52 @@ class NewspaperManager:
                  f'{date_to.strftime("%d.%m.%y")}). {len(pd.date_range(date_from, date_to)) - len(date_range):,} '
                  f'days already indexed.')
         counter = 0
-        with logging_redirect_tqdm(loggers=[log]):
-            for day in tqdm(date_range):
-                counter += 1
-
-                urls, pub_dates = self._get_articles_by_date(day)
+        # Index pages are requested in worker threads, so the network waits of several days overlap. In this case,
+        # _request_many runs sequentially, so at most `concurrency` requests are open at a time. With a single worker,
+        # the pages of one day (e.g. the pagination) are requested concurrently instead.
+        self._concurrent_requests = concurrency <= 1
+        try:
+            with logging_redirect_tqdm(loggers=[log]), ThreadPoolExecutor(max_workers=concurrency) as executor:
+                results = map_bounded(executor, self._get_articles_by_date, date_range, concurrency)
+                for day, (urls, pub_dates) in tqdm(zip(date_range, results), total=len(date_range)):
+                    counter += 1
                 
-                # Remove query strings from urls
-                urls = [url.split('?')[0] for url in urls]
-
-                assert len(urls) == len(set(urls)), \
-                    f'Found {len(urls) - len(set(urls))} duplicates in urls. Please remove them in the newspaper' \
-                    f'specific _get_articles_by_date method.'
-                assert len(urls) == len(pub_dates), \
-                    'Number of urls and pub_dates does not match.'
-                assert all([isinstance(pub_date, dt.datetime) for pub_date in pub_dates]), \
-                    f'Not all pub_dates are datetime objects.'
-                assert all([pub_date.tzinfo is not None for pub_date in pub_dates]), \
-                    f'Not all pub_dates contain timezone info.'
-
-                # Convert pub_dates to UTC
-                pub_dates = [pub_date.astimezone(dt.timezone.utc) for pub_date in pub_dates]
-                # Remove timezone info from pub_dates
-                pub_dates = [pub_date.replace(tzinfo=None) for pub_date in pub_dates]
-
-                urls = pd.DataFrame({'NewspaperID': self.newspaper_id,
-                                     'PubDateIndexPage': pub_dates,
-                                     'DateIndexed': dt.datetime.now(),
-                                     'Public': None,
-                                     'Scraped': False,
-                                     'Processed': False},
-                                    index=urls)
-                # Mark if urls are new
-                urls['new'] = ~urls.index.isin(self._db.df_indexed.index).astype(bool)
-
-                # Add new urls to articles table
-                self._db.df_indexed = pd.concat([self._db.df_indexed, urls[urls['new']].drop('new', axis=1)])
-                log.info(f'{counter}/{len(date_range):>3}: Indexed {urls.new.sum()}/{len(urls):>3} articles '
-                         f'for {day.strftime("%d.%m.%Y")} (n={len(self._db.df_indexed):,}).')
-
-                self._db.save_data('df_indexed', mode='replace')
+                    # Remove query strings from urls
+                    urls = [url.split('?')[0] for url in urls]
+
+                    assert len(urls) == len(set(urls)), \
+                        f'Found {len(urls) - len(set(urls))} duplicates in urls. Please remove them in the newspaper' \
+                        f'specific _get_articles_by_date method.'
+                    assert len(urls) == len(pub_dates), \
+                        'Number of urls and pub_dates does not match.'
+                    assert all([isinstance(pub_date, dt.datetime) for pub_date in pub_dates]), \
+                        f'Not all pub_dates are datetime objects.'
+                    assert all([pub_date.tzinfo is not None for pub_date in pub_dates]), \
+                        f'Not all pub_dates contain timezone info.'
+
+                    # Convert pub_dates to UTC
+                    pub_dates = [pub_date.astimezone(dt.timezone.utc) for pub_date in pub_dates]
+                    # Remove timezone info from pub_dates
+                    pub_dates = [pub_date.replace(tzinfo=None) for pub_date in pub_dates]
+
+                    urls = pd.DataFrame({'NewspaperID': self.newspaper_id,
+                                         'PubDateIndexPage': pub_dates,
+                                         'DateIndexed': dt.datetime.now(),
+                                         'Public': None,
+                                         'Scraped': False,
+                                         'Processed': False},
+                                        index=urls)
+                    # Mark if urls are new
+                    urls['new'] = ~urls.index.isin(self._db.df_indexed.index).astype(bool)
+
+                    # Add new urls to articles table
+                    self._db.df_indexed = pd.concat([self._db.df_indexed, urls[urls['new']].drop('new', axis=1)])
+                    log.info(f'{counter}/{len(date_range):>3}: Indexed {urls.new.sum()}/{len(urls):>3} articles '
+                             f'for {day.strftime("%d.%m.%Y")} (n={len(self._db.df_indexed):,}).')
+
+                    self._db.save_data('df_indexed', mode='replace')
+        finally:
+            self._concurrent_requests = True
 
     # @retry_on_exception
     def index_articles_by_editions(self, edition_from: str, edition_to: str, editions_per_year=55, skip_existing=True):
@@ -327,11 +426,15 @@ class NewspaperManager:
                 self._db.save_data('df_indexed', mode='replace')
 
     @retry_on_exception
-    def scrape_public_articles(self):
+    def scrape_public_articles(self, batch_size: int = 16):
         """
         Checks for all indexed articles if they are publicly available. If they are, the article is scraped and
         the parsed infos are added to the database. If they are not, the article is marked as private. Uses 
         beautifulsoup4 to scrape the articles.
+
+        Args:
+            batch_size (int, optional): Number of articles passed to _soup_get_html_batch at once. Newspapers which
+                implement a concurrent _soup_get_html_batch request these articles in parallel. Defaults to 16.
         """
         to_scrape = self._db.df_indexed[(self._db.df_indexed.NewspaperID == self.newspaper_id) &
                                         (self._db.df_indexed.Public.isnull())]
@@ -343,41 +446,43 @@ class NewspaperManager:
         log.info(f'Start scraping {len(to_scrape):,} public articles.')
         counter = 0
         stats = []
-        with logging_redirect_tqdm(loggers=[log]):
-            for url, row in tqdm(to_scrape.iterrows(), total=len(to_scrape)):
-                counter += 1
-                raw_html, public = self._soup_get_html(url)
-
-                if public:
-                    results = self._parse_article(raw_html, url)
-
-                    # Notifies if new columns are detected in results
-                    for col in results.columns:
-                        if col not in self._db.df_scraped_new.columns:
-                            log.info(f'New feature detected: {col}')
-
-                    # Add results to articles table
-                    self._db.df_scraped_new = pd.concat([self._db.df_scraped_new, results], axis=0)
-                    self._db.df_scraped_new.loc[url, 'DateScrapedHTML'] = dt.datetime.now()
-                    self._db.df_indexed.at[url, 'Scraped'] = True
-
-                    stats.append(1)
-                    # log.info(f'{counter}/{len(to_scrape)}: Article scraped. '
-                    #          f'(Stats: {stats.count(1)}/{stats.count(0)} '
-                    #          f'{stats[-100:].count(1)}/{stats[-100:].count(0)}).')
-                    # todo allow setting for more detailed prints
-
-                else:
-                    stats.append(0)
-                    # log.info(f'{counter}/{len(to_scrape)}: Article is not public. '
-                    #          f'(Stats: {stats.count(1)}/{stats.count(0)} '
-                    #          f'{stats[-100:].count(1)}/{stats[-100:].count(0)}).')
-                    # todo allow setting for more detailed prints
-
-                # Add public information and save both tables
-                self._db.df_indexed.at[url, 'Public'] = public
-                self._db.save_data('df_indexed', mode='replace')
-                self._db.save_data('df_scraped', mode='append')
+        with logging_redirect_tqdm(loggers=[log]), tqdm(total=len(to_scrape)) as pbar:
+            for i in range(0, len(to_scrape), batch_size):
+                batch = to_scrape.index[i:i + batch_size].tolist()
+                for url, (raw_html, public) in zip(batch, self._soup_get_html_batch(batch)):
+                    counter += 1
+
+                    if public:
+                        results = self._parse_article(raw_html, url)
+
+                        # Notifies if new columns are detected in results
+                        for col in results.columns:
+                            if col not in self._db.df_scraped_new.columns:
+                                log.info(f'New feature detected: {col}')
+
+                        # Add results to articles table
+                        self._db.df_scraped_new = pd.concat([self._db.df_scraped_new, results], axis=0)
+                        self._db.df_scraped_new.loc[url, 'DateScrapedHTML'] = dt.datetime.now()
+                        self._db.df_indexed.at[url, 'Scraped'] = True
+
+                        stats.append(1)
+                        # log.info(f'{counter}/{len(to_scrape)}: Article scraped. '
+                        #          f'(Stats: {stats.count(1)}/{stats.count(0)} '
+                        #          f'{stats[-100:].count(1)}/{stats[-100:].count(0)}).')
+                        # todo allow setting for more detailed prints
+
+                    else:
+                        stats.append(0)
+                        # log.info(f'{counter}/{len(to_scrape)}: Article is not public. '
+                        #          f'(Stats: {stats.count(1)}/{stats.count(0)} '
+                        #          f'{stats[-100:].count(1)}/{stats[-100:].count(0)}).')
+                        # todo allow setting for more detailed prints
+
+                    # Add public information and save both tables
+                    self._db.df_indexed.at[url, 'Public'] = public
+                    self._db.save_data('df_indexed', mode='replace')
+                    self._db.save_data('df_scraped', mode='append')
+                    pbar.update()
 
     @retry_on_exception
     def scrape_premium_articles(self, username: str, password: str):
@@ -402,11 +507,15 @@ class NewspaperManager:
         if self._selenium_driver is not None:
             self._selenium_driver.close()
         self._selenium_driver = None
-        # Login
-        login_successful = self._selenium_login(username=username, password=password)
-        if not login_successful:
-            log.warning(f'Login failed. Skip scraping.')
-            return
+        # Login, reusing the cookies of a previous login if they are still valid
+        if self._selenium_restore_login(username=username):
+            log.info('Restored previous login from cookies.')
+        else:
+            login_successful = self._selenium_login(username=username, password=password)
+            if not login_successful:
+                log.warning(f'Login failed. Skip scraping.')
+                return
+            self._selenium_save_login(username=username)
 
         # Scrape articles
         log.info(f'Start scraping {len(to_scrape)} premium articles.')
@@ -493,6 +602,13 @@ class NewspaperManager:
         """
         raise NotImplemented
 
+    def _soup_get_html_batch(self, urls):
+        """
+        Calls _soup_get_html for each url and returns a list of its results. Can be optionally overwritten by the
+        child to request the articles concurrently.
+        """
+        return [self._soup_get_html(url) for url in urls]
+
     def _selenium_get_html(self, url):
         """
         Function to get the html of a private article. Uses selenium to get the html. Can be optionally overwritten by
@@ -513,3 +629,90 @@ class NewspaperManager:
         Exists only as a placeholder. Needs to be implemented by the child class for each newspaper.
         """
         raise NotImplemented
+
+    def _cookie_file(self, username: str):
+        """
+        Path of the file in which the selenium cookies of the last successful login of the given user are stored. The
+        username is only included as a hash.
+        """
+        user_hash = hashlib.sha256(username.encode('utf-8')).hexdigest()[:16]
+        return f'.{self.newspaper_id}_{user_hash}_cookies.pkl'
+
+    def _selenium_save_login(self, username: str):
+        """
+        Stores the cookies of the current selenium session, so later runs can skip the login via
+        _selenium_restore_login.
+
+        The cookies contain session tokens, so they are only stored for newspapers that can restore them (see
+        _selenium_base_url). The file is only readable by the current user and is replaced atomically, so an
+        interrupted run does not leave a truncated file behind.
+
+        Args:
+            username (str): Username of the current login.
+        """
+        if self._selenium_base_url is None:
+            return
+        cookie_file = self._cookie_file(username)
+        tmp_file = f'{cookie_file}.{os.getpid()}.tmp'
+        try:
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(self.selenium_driver.get_cookies(), f)
+            os.replace(tmp_file, cookie_file)
+        except OSError:
+            log.warning('Could not store the login cookies.')
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+    def _selenium_restore_login(self, username: str):
+        """
+        Loads the cookies of a previous login into the selenium driver and checks if the login is still valid. Only
+        works for newspapers which implement _selenium_check_login and set _selenium_base_url. If the login is no
+        longer valid, the cookies are removed from the driver and the stale cookie file is deleted, so the regular
+        login starts from a clean session (including the cookie banner). Unreadable cookie files are deleted as well.
+
+        Args:
+            username (str): Username to login to the newspaper website.
+
+        Returns:
+            bool: True if the restored login is valid, False otherwise.
+        """
+        cookie_file = self._cookie_file(username)
+        if self._selenium_base_url is None or not os.path.exists(cookie_file):
+            return False
+        try:
+            with open(cookie_file, 'rb') as f:
+                cookies = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # A corrupt or truncated file would otherwise fail again on every retry of the login
+            log.warning('Stored login could not be read. Removing the cookie file.')
+            try:
+                os.remove(cookie_file)
+            except OSError:
+                pass
+            return False
+
+        # Cookies can only be added for the domain of the current page
+        self.selenium_driver.get(self._selenium_base_url)
+        for cookie in cookies:
+            try:
+                self.selenium_driver.add_cookie(cookie)
+            except InvalidCookieDomainException:
+                pass
+        self.selenium_driver.get(self._selenium_base_url)
+        if self._selenium_check_login(username=username):
+            return True
+
+        log.info('Stored login is no longer valid.')
+        self.selenium_driver.switch_to.default_content()
+        self.selenium_driver.get(self._selenium_base_url)
+        self.selenium_driver.delete_all_cookies()
+        os.remove(cookie_file)
+        return False
+
+    def _selenium_check_login(self, username: str):
+        """
+        Exists only as a placeholder. Can be implemented by the child class to check if the selenium driver is logged
+        in, which allows to restore previous logins from cookies.
+        """
+        return False
@@ -17,6 +17,7 @@ class _Settings:
     _log_level = 'DEBUG'
     retry_on_exception = True
     save_interval = 60
+    request_timeout = 30
     # selenium_driver = webdriver.Chrome(ChromeDriverManager().install())
     # selenium_driver = "C:\\Users\\Enrico\\Documents\\chromedriver.exe"
     selenium_driver = webdriver.Chrome()
@@ -26,6 +27,7 @@ class _Settings:
         'log_level': 'Log level. Possible values: DEBUG, INFO, WARNING, ERROR, CRITICAL.',
         'retry_on_exception': 'If True, retry on exception.',
         'save_interval': 'Interval in seconds to save the database. Smaller values will slow down the process.',
+        'request_timeout': 'Timeout in seconds for HTTP requests made via requests.',
         'selenium_driver': 'Selenium driver object. Pass a driver object to use it if the provided one does not work.'
     }
 
@@ -4,10 +4,9 @@ The class inherits from the NewspaperManager class and needs an implementation o
 With a similar implementation, it is possible to scrape articles from other news websites.
 """
 import datetime as dt
-import time
 
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as ec
@@ -15,6 +14,26 @@ from selenium.common.exceptions import TimeoutException
 
 from ..utils.logger import log
 from ..scraper import NewspaperManager
+from ..utils.utils import iter_html_elements
+
+# Base url of the archive, used for the relative article and pagination links
+base_url = 'https://archiv.handelsblatt.com'
+# Archive search for all articles of a single day. {d} is the date in the format dd.mm.YYYY.
+_ARCHIVE_URL_TMPL = (base_url + '/dosearch?explicitSearch=true&q=&x=0&y=0&dbShortcut=HBARCHIV_HANDELSBLATT_NAVIGATION'
+                     '&searchMask=7009&TI%2CUT%2CDZ%2CBT%2COT%2CSL=&KO%2CRU=&AU=&CO%2CC2%2CTA%2CKA%2CVA%2CZ1='
+                     '&MM%2COW%2CUF%2CMF%2CAO%2CTP%2CVM%2CNN%2CNJ%2CKV%2CZ2%2CSAT-PERSONS.name=&CT=&CT%2CDE%2CZ4%2CKW='
+                     '&BR%2CGW%2CN1%2CN2%2CNC%2CND%2CSC%2CWZ%2CZ5%2CAI%2CBC%2CKN%2CTN%2CVN%2CK0%2CB4%2CNW%2CVH='
+                     '&Z3%2CCN%2CCE%2CKC%2CTC%2CVC=&timeFilterType=on&DT_from={d}&DT_to={d}')
+
+# Compiled XPath expressions for the hit and pagination elements of the archive search pages
+_LINK_XPATH = etree.XPath("descendant::a[@href][1]/@href")
+_PAGE_LINK_XPATH = etree.XPath(".//a[contains(@href, 'dosearch')]/@href")
+
+# XPaths used during the selenium login
+_XP_PRIVACY_FRAME = '//iframe[@title="Iframe title"]'
+_XP_ZUSTIMMEN = "//button[contains(text(), 'ZUSTIMMEN')]"
+_XP_LOGIN = "//a[contains(text(), 'Login')]"
+_XP_USERNAME = "//span[contains(text(), '{}')]"
 
 
 class DeHandelsblatt(NewspaperManager):
@@ -26,8 +45,13 @@ class DeHandelsblatt(NewspaperManager):
             beautifulsoup.
         - _selenium_login: Login to the newspaper website to allow scraping of premium content after the login. Uses
             selenium.
+        - _parse_search_page: Get the article urls and pagination links of an archive search page.
+        - _selenium_check_login: Check if the selenium driver is logged in. Allows to restore previous logins.
+        - _accept_privacy: Accept the cookie banner during the selenium login, if it is shown.
     """
 
+    _selenium_base_url = 'https://www.handelsblatt.com/'
+
     def __init__(self, db_file: str = 'articles.db'):
         super().__init__(db_file)
 
@@ -43,67 +67,56 @@ class DeHandelsblatt(NewspaperManager):
             [dt.datetime]: List of publication dates of the articles published on the given day. Needs timezone
                 information.
         """
-        # url = f'https://www.handelsblatt.com/archiv/{day.strftime("%Y/%m/%d")}'
-        # print(url)
-        url = f'https://archiv.handelsblatt.com/dosearch?explicitSearch=true&q=&x=0&y=0&dbShortcut=HBARCHIV_HANDELSBLATT_NAVIGATION&searchMask=7009&TI%2CUT%2CDZ%2CBT%2COT%2CSL=&KO%2CRU=&AU=&CO%2CC2%2CTA%2CKA%2CVA%2CZ1=&MM%2COW%2CUF%2CMF%2CAO%2CTP%2CVM%2CNN%2CNJ%2CKV%2CZ2%2CSAT-PERSONS.name=&CT=&CT%2CDE%2CZ4%2CKW=&BR%2CGW%2CN1%2CN2%2CNC%2CND%2CSC%2CWZ%2CZ5%2CAI%2CBC%2CKN%2CTN%2CVN%2CK0%2CB4%2CNW%2CVH=&Z3%2CCN%2CCE%2CKC%2CTC%2CVC=&timeFilterType=on&DT_from={day.strftime("%d.%m.%Y")}&DT_to={day.strftime("%d.%m.%Y")}'
+        day_str = day.strftime("%d.%m.%Y")
+        url = _ARCHIVE_URL_TMPL.format(d=day_str)
         html = self._request(url)
         if html is None:
-            return []
-        soup = BeautifulSoup(html, "html.parser")
-
-        # Get list of article elements
-        # articles = soup.find_all("span", {"class": "hitContent"})
-
-        # # Get article urls
-        # urls = ['https://www.handelsblatt.com' + article['a']['href'] for article in articles]
-
-        # # Also add paginated articles
-        # pages_exist = soup.find("div", {"class": "vhb-teaser-pagination"})
-        # if pages_exist:
-        #     page_urls = pages_exist.find("div", {"class": "vhb-tp-list"}).find_all('a')
-        #     page_urls = ['https://www.handelsblatt.com' + page_url['href'] for page_url in page_urls]
-
-        #     for page_url in page_urls:
-        #         html = self._request(page_url)
-        #         soup = BeautifulSoup(html, "html.parser")
-        #         # Get list of article elements
-        #         articles = soup.find_all("a", {"class": "vhb-teaser-link"})
-        #         # Add article urls to list
-        #         [urls.append('https://www.handelsblatt.com' + article['href']) for article in articles]
-        urls = []
-        hits = soup.find_all("div", class_="hit")
-
-        for hit in hits:
-            link_tag = hit.find("a", href=True)
-            if link_tag and link_tag["href"].startswith("/"):
-                urls.append(base_url + link_tag["href"])
+            return [], []
+        # Get article urls and pagination links
+        urls, page_links = self._parse_search_page(html)
 
         # === Handle pagination ===
-        pagination = soup.find("div", class_="pagination")
-        if pagination:
-            page_links = [a["href"] for a in pagination.find_all("a", href=True) if "dosearch" in a["href"]]
-            page_links = [base_url + href for href in page_links]
-
-            for page_url in page_links:
-                html_page = self._request(page_url)
-                soup_page = BeautifulSoup(html_page, "html.parser")
-                hits_page = soup_page.find_all("div", class_="hit")
-                for hit in hits_page:
-                    link_tag = hit.find("a", href=True)
-                    if link_tag and link_tag["href"].startswith("/"):
-                        urls.append(base_url + link_tag["href"])
+        page_links = [base_url + href for href in page_links]
+        for html_page in self._request_many(page_links):
+            if html_page is None:
+                continue
+            urls.extend(self._parse_search_page(html_page)[0])
 
         # Remove duplicates
         old_len = len(urls)
-        urls = list(set(urls))
-        if len(urls) < old_len:
-            log.warning(f"Removed {old_len - len(urls)} duplicate urls for {day.strftime('%Y-%m-%d')}.")
+        urls = list(dict.fromkeys(urls))
+        removed = old_len - len(urls)
+        if removed > 0:
+            log.warning(f"Removed {removed} duplicate urls for {day_str}.")
 
         # Create list of publication dates, since the website does not provide them
         pub_dates = [dt.datetime.combine(day, dt.datetime.min.time(), tzinfo=dt.timezone.utc)] * len(urls)
 
         return urls, pub_dates
 
+    @staticmethod
+    def _parse_search_page(html):
+        """
+        Stream-parse an archive search page and return the article urls and the pagination links on it.
+
+        Args:
+            html (str or bytes): Html of the archive search page.
+
+        Returns:
+            [str]: List of article urls.
+            [str]: List of relative links to the other pages of the search results.
+        """
+        urls = []
+        page_links = None
+        for div in iter_html_elements(html, 'div', ['hit', 'pagination']):
+            if 'hit' in div.get('class').split():
+                hrefs = _LINK_XPATH(div)
+                if hrefs and hrefs[0].startswith("/"):
+                    urls.append(base_url + hrefs[0])
+            elif page_links is None:
+                page_links = _PAGE_LINK_XPATH(div)
+        return urls, page_links or []
+
     def _soup_get_html(self, url: str):
         """
         For a single article, determine if it is premium content and scrape the html if it is not.
@@ -133,56 +146,68 @@ class DeHandelsblatt(NewspaperManager):
         """
         # Accept cookies on Main Page
         self.selenium_driver.get('https://www.handelsblatt.com/ ')
-        privacy_frame = WebDriverWait(self.selenium_driver, 10).until(
-            ec.presence_of_element_located((By.XPATH, '//iframe[@title="Iframe title"]')))
-        self.selenium_driver.switch_to.frame(privacy_frame)
-        cookie_accept_button = WebDriverWait(self.selenium_driver, 10).until(
-            ec.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'ZUSTIMMEN')]")))
-        cookie_accept_button.click()
+        self._accept_privacy(timeout=10)
 
         # Go to Login Page
         login_button = WebDriverWait(self.selenium_driver, 10).until(
-            ec.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Login')]")))
+            ec.element_to_be_clickable((By.XPATH, _XP_LOGIN)))
         login_button.click()
 
         # Accept cookies on Login Page, if necessary
-        try:
-            time.sleep(1)
-            privacy_frame = WebDriverWait(self.selenium_driver, 10).until(
-                ec.presence_of_element_located((By.XPATH, '//iframe[@title="Iframe title"]')))
-            self.selenium_driver.switch_to.frame(privacy_frame)
-            cookie_accept_button = WebDriverWait(self.selenium_driver, 10).until(
-                ec.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'ZUSTIMMEN')]")))
-            cookie_accept_button.click()
-        except TimeoutException:
-            pass
+        self._accept_privacy(timeout=2)
 
         # Login
-        time.sleep(1)
-        self.selenium_driver.find_element(By.XPATH, '//input[@type="email"]').send_keys(username)
-        time.sleep(1)
-        self.selenium_driver.find_element(By.XPATH, '//input[@type="password"]').send_keys(password)
-        time.sleep(1)
-        self.selenium_driver.find_element(By.XPATH, '//button[@type="submit"]').click()
+        wait = WebDriverWait(self.selenium_driver, 5)
+        wait.until(ec.element_to_be_clickable((By.XPATH, '//input[@type="email"]'))).send_keys(username)
+        wait.until(ec.element_to_be_clickable((By.XPATH, '//input[@type="password"]'))).send_keys(password)
+        wait.until(ec.element_to_be_clickable((By.XPATH, '//button[@type="submit"]'))).click()
 
         # Accept cookies on Login Page after login again
-        try:
-            time.sleep(1)
-            privacy_frame = WebDriverWait(self.selenium_driver, 10).until(
-                ec.presence_of_element_located((By.XPATH, '//iframe[@title="Iframe title"]')))
-            self.selenium_driver.switch_to.frame(privacy_frame)
-            cookie_accept_button = WebDriverWait(self.selenium_driver, 10).until(
-                ec.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'ZUSTIMMEN')]")))
-            cookie_accept_button.click()
-        except TimeoutException:
-            pass
+        self._accept_privacy(timeout=2)
 
         # Check if login was successful
+        if self._selenium_check_login(username):
+            log.info('Logged in to Handelsblatt.')
+            return True
+        log.error('Login to Handelsblatt failed.')
+        return False
+
+    def _selenium_check_login(self, username: str):
+        """
+        Check if the selenium driver is logged in, i.e. if the username is shown on the current page.
+
+        Args:
+            username (str): Username to login to the newspaper website.
+
+        Returns:
+            bool: True if logged in, False otherwise.
+        """
         try:
             WebDriverWait(self.selenium_driver, 10).until(
-                ec.presence_of_element_located((By.XPATH, f"//span[contains(text(), '{username}')]")))
-            log.info('Logged in to Handelsblatt.')
+                ec.presence_of_element_located((By.XPATH, _XP_USERNAME.format(username))))
+            return True
+        except TimeoutException:
+            return False
+
+    def _accept_privacy(self, timeout: int = 2):
+        """
+        Accept the cookie banner, which is shown in an iframe. Returns quickly if the banner does not show up.
+
+        Args:
+            timeout (int, optional): Seconds to wait for the banner. Defaults to 2.
+
+        Returns:
+            bool: True if the banner was accepted, False if it did not show up.
+        """
+        try:
+            privacy_frame = WebDriverWait(self.selenium_driver, timeout).until(
+                ec.presence_of_element_located((By.XPATH, _XP_PRIVACY_FRAME)))
+            self.selenium_driver.switch_to.frame(privacy_frame)
+            cookie_accept_button = WebDriverWait(self.selenium_driver, timeout).until(
+                ec.element_to_be_clickable((By.XPATH, _XP_ZUSTIMMEN)))
+            cookie_accept_button.click()
             return True
         except TimeoutException:
-            log.error('Login to Handelsblatt failed.')
             return False
+        finally:
+            self.selenium_driver.switch_to.default_content()
@@ -7,15 +7,31 @@ import re
 import datetime as dt
 
 import requests
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 import pandas as pd
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as ec
 from selenium.common.exceptions import NoSuchElementException
+from selenium.common.exceptions import TimeoutException
 
 from ..utils.logger import log
 from ..scraper import NewspaperManager
+from ..utils.utils import iter_html_elements
+
+# Publication date as shown on the archive page, e.g. '01.02.2023 | 12:34'
+_DATE_RE = re.compile(r'(\d{2})\.(\d{2})\.(\d{4})\s*\|?\s*(\d{2}):(\d{2})')
+
+# Compiled XPath expressions for the archive page
+_LINK_XPATH = etree.XPath(".//a[contains(@class, 'c-teaser__headline-link')]/@href")
+_DATE_XPATH = etree.XPath(".//span[contains(@class, 'c-teaser__date')]")
+
+# Premium marker on article pages. The regex is a cheap pre-check on the raw html for any occurrence of the class
+# name, the XPath decides if it is actually the premium icon in the article header.
+_PREMIUM_RE = re.compile(rb'c-article-header__premium')
+_PREMIUM_XPATH = etree.XPath("boolean(//header[contains(@class, 'r-header--default')]"
+                              "//a[contains(@class, 'c-article-header__premium')])")
 
 
 class DeWelt(NewspaperManager):
@@ -24,11 +40,16 @@ class DeWelt(NewspaperManager):
     These methods are:
         - _get_articles_by_date: Index articles published on a given day and return the urls and publication dates.
         - _soup_get_html: Determine if an article is premium content and scrape the html if it is not. Uses
-            beautifulsoup.
+            lxml.
+        - _soup_get_html_batch: Same as _soup_get_html for multiple articles, which are requested concurrently.
+        - _is_public: Check the html of an article for the premium icon.
+        - _selenium_check_login: Check if the selenium driver is logged in. Allows to restore previous logins.
         - _selenium_login: Login to the newspaper website to allow scraping of premium content after the login. Uses
             selenium.
     """
 
+    _selenium_base_url = 'https://www.welt.de/'
+
     def __init__(self, db_file: str = 'articles.db'):
         super().__init__(db_file)
 
@@ -44,97 +65,69 @@ class DeWelt(NewspaperManager):
             [dt.datetime]: List of publication dates of the articles published on the given day. Needs timezone
                 information.
         """
-        # print(day.strftime())
         url = f'https://www.welt.de/schlagzeilen/nachrichten-vom-{day.strftime("%d-%m-%Y")}.html'
-        # print(url)
         html = self._request(url)
-        
-
-        # if html is None:
-        #     return [], []
-
-        soup = BeautifulSoup(html, "html.parser")
-        # print(soup)
-
-        ###### OLD
-        # # Get list of article elements
-        # articles = soup.find_all("article", {"class": "c-teaser c-teaser--archive"})
-
-        # # Get articles urls
-        # urls = ['https://www.welt.de' + article.find('h4').find('a')['href'] for article in articles]
-
-        # # Get articles publication dates
-        # time_regex = re.compile(r'\d{2}\.\d{2}\.\d{4}\s\|\s\d{2}:\d{2}')
-        # pub_dates = [pd.to_datetime(f'{article.find(string=time_regex)}', format='%d.%m.%Y | %H:%M')
-        #              for article in articles]
-        # # Add timezone Europe/Berlin to pub_dates
-        # pub_dates = [pub_date.tz_localize('UTC') for pub_date in pub_dates]
-
-
-        ##### NEW
-        # articles = soup.select('li.c-teaser__item article')
-        # articles = soup.select('is-link c-teaser__headline-link is-teaser-link')
-        # articles = soup.find_all(article, _class='c-teaser c-teaser--archive')
-        articles = soup.find_all("article", {"class": "c-teaser c-teaser--archive"})
-
-        # print(articles)
-
-        if not articles:
-            print(f"[INFO] No articles found for {day.strftime('%d-%m-%Y')}")
-            return ([], [])   # <---- still return two empty lists
+        if html is None:
+            return [], []
 
-        # Get article URLs
-        # urls = ['https://www.welt.de' + art.find('a')['href'] for art in articles if art.find('a')]
-        urls = [('https://www.welt.de' + a['href'] if not a['href'].startswith('http') else a['href']) for a in soup.select('a.c-teaser__headline-link')]
-        # print(urls)
-
-        # Get publication dates (prefer datetime attribute if present)    
+        urls = []
         pub_dates = []
-        for art in articles:
-            time_tag = art.find('span', {'class':'c-teaser__date'})
-            text = None
-            if time_tag:
+        # Stream the archive page, since it can contain several hundred articles
+        for art in iter_html_elements(html, 'article', ['c-teaser--archive']):
+            # Get article URL
+            links = _LINK_XPATH(art)
+            if not links:
+                continue
+            href = links[0]
+            urls.append('https://www.welt.de' + href if not href.startswith('http') else href)
+
+            # Get publication date (prefer datetime attribute if present)
+            time_tags = _DATE_XPATH(art)
+            if time_tags:
+                time_tag = time_tags[0]
                 # Priority: try machine-readable datetime attribute
-                if time_tag.has_attr('datetime'):
-                    dt = pd.to_datetime(time_tag['datetime'], errors='coerce', utc=True)
-                    pub_dates.append(dt)
+                if time_tag.get('datetime') is not None:
+                    pub_dates.append(pd.to_datetime(time_tag.get('datetime'), errors='coerce', utc=True))
                     continue
-                else:
-                    text = time_tag.get_text(strip=True)
+                text = ''.join(time_tag.itertext()).strip()
             else:
                 # Fallback: sometimes date is not in <time> but in plain text
-                text = art.get_text(" ", strip=True)
-            
+                text = ' '.join(' '.join(art.itertext()).split())
+
             if not text:
                 pub_dates.append(pd.NaT)
                 continue
 
+            # Fast path: German date format (e.g. '01.02.2023 | 12:34')
+            match = _DATE_RE.search(text)
+            if match:
+                day_, month, year, hour, minute = map(int, match.groups())
+                pub_dates.append(dt.datetime(year, month, day_, hour, minute, tzinfo=dt.timezone.utc))
+                continue
+
             # Normalize separators
             text = text.replace('Uhr', '').replace(',', '').strip()
 
-            # Try multiple known formats
-            parsed = pd.NaT
-            for fmt in ('%d.%m.%Y | %H:%M', '%d.%m.%Y %H:%M', '%B %d %Y | %I:%M %p', '%B %d %Y %I:%M %p'):
-                try:
-                    parsed = pd.to_datetime(text, format=fmt, utc=True)
-                    break
-                except Exception:
-                    continue
-
-            # Last resort: let pandas infer (slow but flexible)
-            if pd.isna(parsed):
+            # English date format (e.g. 'February 01 2023 | 12:34 PM'), pick the format instead of trying all
+            fmt = '%B %d %Y | %I:%M %p' if '|' in text else '%B %d %Y %I:%M %p'
+            try:
+                parsed = dt.datetime.strptime(text, fmt).replace(tzinfo=dt.timezone.utc)
+            except ValueError:
+                # Last resort: let pandas infer (slow but flexible)
                 parsed = pd.to_datetime(text, errors='coerce', utc=True)
 
             pub_dates.append(parsed)
 
-        df = pd.DataFrame({"url": urls, "pub_date": pub_dates})
-        df = df.drop_duplicates(subset="url").reset_index(drop=True)
+        if not urls:
+            log.info(f"No articles found for {day.strftime('%d-%m-%Y')}.")
+            return [], []
 
-        # ---- Ensure timezone ----
-        df["pub_date"] = pd.to_datetime(df["pub_date"], errors="coerce")
+        # Remove duplicates, keeping the first publication date of each url
+        unique = {}
+        for url, pub_date in zip(urls, pub_dates):
+            unique.setdefault(url, pub_date)
 
-        return df["url"].tolist(), df["pub_date"].tolist()        
-        # return urls, pub_dates
+        return list(unique), list(unique.values())
 
     def _soup_get_html(self, url: str):
         """
@@ -150,15 +143,38 @@ class DeWelt(NewspaperManager):
         html = self._request(url)
         if not html:
             return None, False
-        soup = BeautifulSoup(html, "html.parser")
-        # print(url)
-        try:
-            premium_icon = soup.find("header", {"class": "r-header r-header--default"}). \
-                find('a', {"class": "is-link c-article-header__premium"})
-            return html, not bool(premium_icon)
-        except AttributeError:
-            log.warning(f'Could not identify if article is premium: {url}.')
-            return None, False
+        return html, self._is_public(html)
+
+    def _soup_get_html_batch(self, urls: list):
+        """
+        For multiple articles, request them concurrently, determine if they are premium content and return the html of
+        the ones that are not.
+
+        Args:
+            urls ([str]): Urls of the articles to scrape.
+
+        Returns:
+            [(str, bool)]: Html and public flag of each article, as returned by _soup_get_html.
+        """
+        return [(html, self._is_public(html)) if html else (None, False)
+                for html in self._request_many(urls, limit=16)]
+
+    @staticmethod
+    def _is_public(html):
+        """
+        Determine if an article is public, i.e. if its header does not contain the premium icon.
+
+        Args:
+            html (str or bytes): Html of the article.
+
+        Returns:
+            bool: True if the article is public, False otherwise.
+        """
+        # Most articles do not contain the premium class at all, so the full parse is only needed on a match to make
+        # sure the icon is part of the article header
+        if not _PREMIUM_RE.search(html.encode('utf-8') if isinstance(html, str) else html):
+            return True
+        return not _PREMIUM_XPATH(lxml.html.fromstring(html))
 
     def _selenium_login(self, username: str, password: str):
         """
@@ -172,11 +188,10 @@ class DeWelt(NewspaperManager):
         """
         # Login
         self.selenium_driver.get('https://lo.la.welt.de/login')
-        WebDriverWait(self.selenium_driver, 10).until(
-            ec.presence_of_element_located((By.NAME, 'username')))
-        self.selenium_driver.find_element(By.NAME, 'username').send_keys(username)
-        self.selenium_driver.find_element(By.NAME, 'password').send_keys(password)
-        self.selenium_driver.find_element(By.CSS_SELECTOR, 'button[type="submit"]').click()
+        wait = WebDriverWait(self.selenium_driver, 10)
+        wait.until(ec.element_to_be_clickable((By.NAME, 'username'))).send_keys(username)
+        wait.until(ec.element_to_be_clickable((By.NAME, 'password'))).send_keys(password)
+        wait.until(ec.element_to_be_clickable((By.CSS_SELECTOR, 'button[type="submit"]'))).click()
 
         # Go to main page and accept cookies
         self.selenium_driver.get('https://www.welt.de/')
@@ -185,19 +200,32 @@ class DeWelt(NewspaperManager):
         )
         self.selenium_driver.switch_to.frame(privacy_frame)
         WebDriverWait(self.selenium_driver, 10).until(
-            ec.presence_of_element_located((By.CSS_SELECTOR, 'button[title="Alle akzeptieren"]')))
-        self.selenium_driver.find_element(By.CSS_SELECTOR, 'button[title="Alle akzeptieren"]').click()
+            ec.element_to_be_clickable((By.CSS_SELECTOR, 'button[title="Alle akzeptieren"]'))).click()
+        self.selenium_driver.switch_to.default_content()
 
         # Check if login was successful
+        if self._selenium_check_login(username):
+            log.info('Logged in to Welt Plus.')
+            return True
+        log.warning('Login to Welt Plus failed.')
+        return False
+
+    def _selenium_check_login(self, username: str):
+        """
+        Check if the selenium driver is logged in, i.e. if the personal "Meine Welt" page greets the user.
+
+        Args:
+            username (str): Username to login to the newspaper website.
+
+        Returns:
+            bool: True if logged in, False otherwise.
+        """
         try:
             self.selenium_driver.get('https://www.welt.de/meinewelt/')
-            WebDriverWait(self.selenium_driver, 10).until(
+            _elem = WebDriverWait(self.selenium_driver, 10).until(
                 ec.presence_of_element_located((By.CSS_SELECTOR, 'div[data-component-name="home"]')))
-            _elem = self.selenium_driver.find_element(By.CSS_SELECTOR, 'div[data-component-name="home"]')
             WebDriverWait(_elem, 10).until(ec.presence_of_element_located((By.CSS_SELECTOR, 'div[name="greeting"]')))
             self.selenium_driver.get('https://www.welt.de')
-            log.info('Logged in to Welt Plus.')
             return True
-        except NoSuchElementException:
-            log.warning('Login to Welt Plus failed.')
+        except (NoSuchElementException, TimeoutException):
             return False
@@ -6,7 +6,8 @@ With a similar implementation, it is possible to scrape articles from other news
 """
 
 import requests
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as ec
@@ -16,6 +17,12 @@ from selenium.common.exceptions import TimeoutException
 from ..utils.logger import log
 from ..scraper import NewspaperManager
 
+# Compiled XPath expression for the edition index page. Selects the first link of each article if it points to zeit.de.
+_ARTICLE_LINK_XPATH = etree.XPath("//article/descendant::a[1][starts-with(@href, 'https://www.zeit.de/')]/@href")
+
+# Compiled XPath expression for the paywall on article pages
+_PAYWALL_XPATH = etree.XPath("boolean(//aside[@id='paywall'])")
+
 
 class DeZeit(NewspaperManager):
     """
@@ -23,13 +30,16 @@ class DeZeit(NewspaperManager):
     These methods are:
         - _get_articles_by_date: Index articles published in a given edition and return the urls and publication
         - _soup_get_html: Determine if an article is premium content and scrape the html if it is not. Uses
-            beautifulsoup.
+            lxml.
         - _selenium_login: Login to the newspaper website to allow scraping of premium content after the login. Uses
             selenium.
+        - _selenium_check_login: Check if the selenium driver is logged in. Allows to restore previous logins.
         - _selenium_get_html: Scrape the html of an article using selenium. Uses selenium. A specific implementation is
             needed here because the website uses pagination on some articles.
     """
 
+    _selenium_base_url = 'https://www.zeit.de/index'
+
     def __init__(self, db_file: str = 'articles.db'):
         super().__init__(db_file)
 
@@ -51,21 +61,24 @@ class DeZeit(NewspaperManager):
 
         html = self._request(url)
 
-        if html is None:
+        if html is None or not html.strip():
+            return []
+        try:
+            tree = lxml.html.fromstring(html)
+        except (etree.ParserError, ValueError):
+            log.warning(f"Error parsing html: {url}")
             return []
-        soup = BeautifulSoup(html, "html.parser")
 
-        # Get list of article elements
-        articles = soup.find_all("article")
         # Get articles urls
-        urls = [article.find('a')['href'] for article in articles]
-        urls = [url for url in urls if url.startswith('https://www.zeit.de/')]
+        urls = _ARTICLE_LINK_XPATH(tree)
 
         
         # Remove duplicates
         old_len = len(urls)
-        urls = list(set(urls))
-        log.warning(f"Removed {old_len - len(urls)} duplicate urls for {year}/{edition:02}.")
+        urls = list(dict.fromkeys(urls))
+        removed = old_len - len(urls)
+        if removed > 0:
+            log.warning(f"Removed {removed} duplicate urls for {year}/{edition:02}.")
 
         return urls
 
@@ -80,37 +93,26 @@ class DeZeit(NewspaperManager):
             str: Html of the article. If the article is premium content, None is returned.
             bool: True if the article is premium content, False otherwise.
         """
-        import traceback
-        try:            
-            html = self._request(url)
-            # log.info(url)
-
-            if html is None:
-                log.warning(f"Problem requesting: {url}")
-                return None, False       
-            try:
-                soup = BeautifulSoup(html, "html.parser")
-            except Exception as e:
-                info.warining(f"Error parsing bs: {url}")
-                return None, False 
-
-            # Run again with /komplettansicht if a full page exists
-            komplettansicht_link = soup.find("a", href=f"{url}/komplettansicht")
-            
-            # log.info(komplettansicht_link)
-            
-            if komplettansicht_link:
-                return self._soup_get_html(f"{url}/komplettansicht")
-            try:
-                premium_icon = soup.find('aside', {'id': 'paywall'})
-                return html, not bool(premium_icon)
-            except AttributeError:
-                log.warning(f'Could not identify if article is premium: {url}.')
-                return None, False
-        except TypeError:
-            print(traceback.format_exc())
+        html = self._request(url)
+        if html is None:
+            log.warning(f"Problem requesting: {url}")
+            return None, False
+
+        # Paginated articles are only complete under /komplettansicht. The link is detected in the raw html, so only
+        # the page that is actually used gets parsed. Redirects (e.g. to a paywall or consent page) are ignored.
+        full_url = f'{url}/komplettansicht'
+        if (full_url.encode() if isinstance(html, bytes) else full_url) in html:
+            response = self._request(full_url, get_full_response=True)
+            if response is not None and response.url.rstrip('/').endswith('/komplettansicht'):
+                html = self._response_html(response)
+        try:
+            premium_icon = _PAYWALL_XPATH(lxml.html.fromstring(html))
+        except (etree.ParserError, ValueError):
+            # ValueError is raised for str input with an XML encoding declaration
+            log.warning(f"Error parsing html: {url}")
             return None, False
 
+        return html, not premium_icon
 
     def _selenium_login(self, username: str, password: str):
         """
@@ -124,22 +126,14 @@ class DeZeit(NewspaperManager):
         """
         # Login
         self.selenium_driver.get('https://meine.zeit.de/anmelden')
-        self.selenium_driver.find_element(By.XPATH, '//input[@type="email"]').send_keys(username)
-        self.selenium_driver.find_element(By.XPATH, '//input[@type="password"]').send_keys(password)
-        self.selenium_driver.find_element(By.XPATH, '//input[@type="submit"]').click()
-
-        # confirm = WebDriverWait(self.selenium_driver, 60).until(
-        #     ec.presence_of_element_located((By.XPATH, '//*[@id="kc-login"]')))
-
-        # self.selenium_driver.find_element(By.XPATH, '//*[@id="kc-login"]').click()
-
-        from selenium.webdriver.support import expected_conditions as EC
-        
-        confirm = WebDriverWait(self.selenium_driver, 60).until(
-            EC.element_to_be_clickable((By.XPATH, '//*[@id="kc-login"]'))
-        )
+        wait = WebDriverWait(self.selenium_driver, 10)
+        wait.until(ec.element_to_be_clickable((By.XPATH, '//input[@type="email"]'))).send_keys(username)
+        wait.until(ec.element_to_be_clickable((By.XPATH, '//input[@type="password"]'))).send_keys(password)
+        wait.until(ec.element_to_be_clickable((By.XPATH, '//input[@type="submit"]'))).click()
 
-        confirm.click()
+        # Confirm login
+        WebDriverWait(self.selenium_driver, 60).until(
+            ec.element_to_be_clickable((By.XPATH, '//*[@id="kc-login"]'))).click()
 
         self.selenium_driver.get('https://www.zeit.de/index')
 
@@ -147,22 +141,33 @@ class DeZeit(NewspaperManager):
         privacy_frame = WebDriverWait(self.selenium_driver, 20).until(
             ec.presence_of_element_located((By.XPATH, '//iframe[@title="Consent Message"]')))
         self.selenium_driver.switch_to.frame(privacy_frame)
-
-        # time.sleep
         cookie_accept_button = WebDriverWait(self.selenium_driver, 20).until(
             ec.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Agree and continue')]")))
         cookie_accept_button.click()
 
         # Check if login was successful
         self.selenium_driver.switch_to.default_content()
-        
+        if self._selenium_check_login(username):
+            log.info('Logged in to Zeit Plus.')
+            return True
+        log.error('Login to Zeit Plus failed.')
+        return False
+
+    def _selenium_check_login(self, username: str):
+        """
+        Check if the selenium driver is logged in, i.e. if the user dashboard is shown on the current page.
+
+        Args:
+            username (str): Username to login to the newspaper website.
+
+        Returns:
+            bool: True if logged in, False otherwise.
+        """
         try:
             WebDriverWait(self.selenium_driver, 10).until(
                 ec.presence_of_element_located((By.XPATH, '//div[@data-render="dashboard"]')))
-            log.info('Logged in to Zeit Plus.')
             return True
         except TimeoutException:
-            log.error('Login to Zeit Plus failed.')
             return False
 
     def _selenium_get_html(self, url):
@@ -1,21 +1,36 @@
 """
-This module contains some utility functions and decorators:
+This module contains some utility functions, decorators and classes:
     - retry_on_exception: Decorator to retry a function if an exception is raised.
     - delay_interrupt: Decorator to delay keyboard interrupts.
     - get_selenium_webdriver: Returns a selenium webdriver object.
     - flatten_dict: Recursively flattens a nested dictionary.
+    - AsyncFetcher: Concurrently requests lists of urls with aiohttp, reusing connections between calls.
+    - map_bounded: Like Executor.map, but only keeps a limited number of calls in flight.
+    - html_body: Returns a response body as bytes, or decoded if only the header declares the charset.
+    - iter_html_elements: Incrementally parses an html document and yields all elements with a given tag and class.
 """
+import io
+import re
 import sys
 import os
 import functools
 import time
 import signal
+import asyncio
+import itertools
+from collections import deque
 
+import aiohttp
+from lxml import etree
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service
 
 from ..utils.logger import log
 from .. import settings
+from ..constants import REQUEST_HEADERS
+
+# Charset declaration inside an html document (<meta charset=...> or <meta http-equiv=... content="...; charset=...">)
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset', re.IGNORECASE)
 
 
 def retry_on_exception(func):
@@ -105,3 +120,152 @@ def flatten_dict(d, parent_key='', sep='_'):
         else:
             items.append((new_key, v))
     return dict(items)
+
+
+def map_bounded(executor, func, items, window):
+    """
+    Like Executor.map, but only keeps `window` calls submitted at a time. Results are yielded in the order of items. If
+    the caller stops early (e.g. due to an exception), at most `window` calls are still running instead of all
+    remaining items.
+
+    Args:
+        executor (concurrent.futures.Executor): Executor to run the calls in.
+        func (callable): Function to call for each item.
+        items (iterable): Items to pass to func.
+        window (int): Maximum number of submitted calls.
+
+    Yields:
+        The result of func for each item.
+    """
+    items = iter(items)
+    pending = deque(executor.submit(func, item) for item in itertools.islice(items, window))
+    while pending:
+        future = pending.popleft()
+        for item in itertools.islice(items, 1):
+            pending.append(executor.submit(func, item))
+        yield future.result()
+
+
+def html_body(content, charset=None):
+    """
+    Returns the body of a response for the html parsers. If the document declares its charset itself, or the header
+    declares none, the raw bytes are returned so the parsers detect the encoding without decoding twice. Otherwise the
+    body is decoded with the charset of the Content-Type header, which the parsers could not see.
+
+    Args:
+        content (bytes): Raw body of the response.
+        charset (str, optional): Charset declared in the Content-Type header. Defaults to None.
+
+    Returns:
+        bytes or str: The body.
+    """
+    if charset is None or _META_CHARSET_RE.search(content[:4096]):
+        return content
+    try:
+        return content.decode(charset, errors='replace')
+    except LookupError:
+        return content
+
+
+def iter_html_elements(html, tag, classes):
+    """
+    Incrementally parses an html document and yields all elements with the given tag and at least one of the given
+    classes. Each yielded element is cleared after it has been processed, together with its already processed
+    siblings, so memory usage stays low on large pages. Other elements are left untouched, so the yielded elements
+    keep all their children.
+
+    Args:
+        html (str or bytes): The html document.
+        tag (str): Tag of the elements to yield (e.g. 'article').
+        classes ([str]): Classes of the elements to yield.
+
+    Yields:
+        lxml.etree._Element: The next matching element. Only valid until the next element is requested.
+    """
+    encoding = None
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+        encoding = 'utf-8'
+    # libxml2 fails on an empty document instead of returning no elements
+    if not html.strip():
+        return
+    classes = set(classes)
+    for _, elem in etree.iterparse(io.BytesIO(html), events=('end',), tag=tag, html=True, recover=True,
+                                   encoding=encoding):
+        if classes.isdisjoint(elem.get('class', '').split()):
+            continue
+        yield elem
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+
+class AsyncFetcher:
+    """
+    Concurrently requests urls with aiohttp. The event loop and the client session are kept alive between calls of
+    fetch_all, so connections are reused across batches. Needs to be closed with close().
+
+    Args:
+        timeout (float, optional): Timeout in seconds for connecting and for each read of a response. Time spent
+            waiting for a free connection is not counted. Defaults to None.
+        max_connections (int, optional): Maximum number of open connections of the shared pool. Defaults to 32.
+    """
+
+    def __init__(self, timeout=None, max_connections=32):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._loop = None
+        self._session = None
+
+    def fetch_all(self, urls, limit=8):
+        """
+        Concurrently requests all urls. Failed requests are logged and returned as None, similar to
+        NewspaperManager._request. Can not be called while an event loop is running in the same thread.
+
+        Args:
+            urls ([str]): Urls to request.
+            limit (int, optional): Maximum number of simultaneous requests. Defaults to 8.
+
+        Returns:
+            [bytes or str]: Html of each url in the order of urls (see html_body). None if the request failed.
+        """
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(self._fetch_all(urls, limit))
+
+    async def _fetch_all(self, urls, limit):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=self.timeout, sock_read=self.timeout)
+            self._session = aiohttp.ClientSession(connector=connector, headers=REQUEST_HEADERS, timeout=timeout)
+        semaphore = asyncio.Semaphore(limit)
+        return await asyncio.gather(*[_fetch(self._session, semaphore, url) for url in urls])
+
+    def close(self):
+        """
+        Closes the client session and the event loop.
+        """
+        if self._session is not None:
+            self._loop.run_until_complete(self._session.close())
+        if self._loop is not None:
+            self._loop.close()
+        self._loop = None
+        self._session = None
+
+
+async def _fetch(session, semaphore, url):
+    """
+    Requests a single url within an aiohttp session and returns its html (see html_body) or None. The semaphore limits
+    the number of simultaneous requests.
+    """
+    async with semaphore:
+        try:
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return html_body(await response.read(), response.charset)
+                elif response.status != 404:
+                    log.warning(f"{response.status} error scraping {response.url}.")
+                return None
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            log.warning(f'Connection error while requesting {url}.')
+            return None